@@ -3,6 +3,27 @@ import { getServerSession } from 'next-auth';
 import { authOptions } from '@/lib/auth';
 import { PredictionResult, AssetAnalysis } from '@/types';
 import { analyzeContentWithOpenAI } from '@/lib/openai-analysis';
+import { PLATFORMS, MAX_UPLOAD_BYTES, MAX_IMAGE_BYTES, SUPPORTED_IMAGE_TYPES, getMediaType } from '@/lib/constants';
+
+const SUPPORTED_PLATFORMS = new Set(PLATFORMS.map(platform => platform.id));
+
+// Returns null when the field is missing or is not a JSON array of strings
+function parsePlatforms(value: FormDataEntryValue | null): string[] | null {
+  if (typeof value !== 'string') {
+    return null;
+  }
+
+  try {
+    const parsed: unknown = JSON.parse(value);
+    if (Array.isArray(parsed) && parsed.every(platform => typeof platform === 'string')) {
+      // Drop repeated ids so each platform is scored and counted once
+      return [...new Set(parsed)];
+    }
+  } catch {
+    // Fall through to the invalid-input result
+  }
+  return null;
+}
 
 export async function POST(request: NextRequest) {
   console.log('API predict called - using OpenAI vision analysis');
@@ -19,26 +40,86 @@ export async function POST(request: NextRequest) {
       );
     }
 
+    // Reject non-multipart and oversized bodies before buffering the payload
+    if (!request.headers.get('content-type')?.toLowerCase().startsWith('multipart/form-data')) {
+      return NextResponse.json(
+        { error: 'Expected a multipart/form-data upload' },
+        { status: 415 }
+      );
+    }
+
+    // Chunked bodies without a length would otherwise bypass the size check below.
+    // This caps what is accepted; formData() still buffers up to MAX_UPLOAD_BYTES.
+    const contentLengthHeader = request.headers.get('content-length');
+    if (!contentLengthHeader || !/^\d+$/.test(contentLengthHeader.trim())) {
+      return NextResponse.json(
+        { error: 'Content-Length header is required' },
+        { status: 411 }
+      );
+    }
+
+    if (Number(contentLengthHeader) > MAX_UPLOAD_BYTES) {
+      return NextResponse.json(
+        { error: 'File is too large' },
+        { status: 413 }
+      );
+    }
+
     const formData = await request.formData();
-    const file = formData.get('file') as File;
-    const platforms = JSON.parse(formData.get('platforms') as string);
+    const upload = formData.get('file');
+    const platforms = parsePlatforms(formData.get('platforms'));
     
-    console.log('File:', file?.name, 'Platforms:', platforms);
+    console.log('File:', upload instanceof File ? upload.name : 'none', 'Platforms:', platforms);
 
-    if (!file) {
+    if (!(upload instanceof File)) {
       return NextResponse.json(
         { error: 'No file provided' },
         { status: 400 }
       );
     }
 
-    if (!platforms || !Array.isArray(platforms) || platforms.length === 0) {
+    // Fill in an empty browser-reported type from the extension so later code can rely on file.type
+    const mediaType = getMediaType(upload);
+    const file = mediaType === upload.type ? upload : new File([upload], upload.name, { type: mediaType });
+
+    // Images must be a format the vision API accepts; videos are analyzed from metadata only
+    if (!SUPPORTED_IMAGE_TYPES.has(file.type) && !file.type.startsWith('video/')) {
+      return NextResponse.json(
+        { error: 'Unsupported file type. Please upload a PNG, JPEG, GIF or WebP image, or a video.' },
+        { status: 400 }
+      );
+    }
+
+    const maxFileBytes = file.type.startsWith('image/') ? MAX_IMAGE_BYTES : MAX_UPLOAD_BYTES;
+    if (file.size > maxFileBytes) {
+      return NextResponse.json(
+        { error: `File is too large (limit ${Math.round(maxFileBytes / (1024 * 1024))} MB)` },
+        { status: 413 }
+      );
+    }
+
+    if (!platforms) {
+      return NextResponse.json(
+        { error: 'Invalid platforms field' },
+        { status: 400 }
+      );
+    }
+
+    if (platforms.length === 0) {
       return NextResponse.json(
         { error: 'No platforms selected' },
         { status: 400 }
       );
     }
 
+    const unsupportedPlatforms = platforms.filter(platform => !SUPPORTED_PLATFORMS.has(platform));
+    if (unsupportedPlatforms.length > 0) {
+      return NextResponse.json(
+        { error: `Unsupported platforms: ${unsupportedPlatforms.join(', ')}` },
+        { status: 400 }
+      );
+    }
+
     // Use real OpenAI analysis
     console.log('Starting OpenAI vision analysis...');
     let aiResult;
@@ -78,14 +159,26 @@ export async function POST(request: NextRequest) {
       );
     }
 
-    console.log('OpenAI analysis result keys:', Object.keys(aiResult));
-    console.log('Platform recommendations:', aiResult.platformRecommendations);
+    // Dumping the nested result is only useful locally and costly to format on every request
+    if (process.env.NODE_ENV === 'development') {
+      console.log('OpenAI analysis result keys:', Object.keys(aiResult));
+      console.log('Platform recommendations:', aiResult.platformRecommendations);
+    }
     console.log('Overall score:', aiResult.overallScore);
 
+    // Raw 0-100 score per selected platform, shared by predictions and tailored recommendations
+    const fallbackPlatformScore = Math.round((aiResult.overallScore || 60) * 0.8);
+    const platformScores: Record<string, number> = Object.fromEntries(
+      platforms.map((platform: string) => [
+        platform,
+        aiResult.platformRecommendations?.[platform]?.score || fallbackPlatformScore
+      ])
+    );
+
     // Transform AI result to match frontend expectations
     const predictions: PredictionResult[] = platforms.map((platform: string) => {
       const platformRec = aiResult.platformRecommendations?.[platform] || {};
-      const rawScore = platformRec.score || Math.round((aiResult.overallScore || 60) * 0.8);
+      const rawScore = platformScores[platform];
       return {
         platform,
         successScore: Math.min(10, Math.max(0, Math.round(rawScore / 10))), // Convert to 0-10 scale, cap at 10
@@ -119,13 +212,14 @@ export async function POST(request: NextRequest) {
         polarizationReason: 'Content appears to have broad appeal',
         emotionalTriggers: aiResult.visualAnalysis?.emotions || []
       },
+      // Selected platforms reuse the shared score map; the rest keep their own estimates
       platformFitAnalysis: {
-        instagram: aiResult.platformRecommendations?.instagram?.score ?? Math.round((aiResult.overallScore || 60) * 0.9),
-        tiktok: aiResult.platformRecommendations?.tiktok?.score ?? Math.round((aiResult.overallScore || 60) * 0.85),
-        linkedin: aiResult.platformRecommendations?.linkedin?.score ?? Math.round((aiResult.overallScore || 60) * 0.8),
-        twitter: aiResult.platformRecommendations?.twitter?.score ?? Math.round((aiResult.overallScore || 60) * 0.85),
-        facebook: aiResult.platformRecommendations?.facebook?.score ?? Math.round((aiResult.overallScore || 60) * 0.9),
-        snapchat: aiResult.platformRecommendations?.snapchat?.score ?? Math.round((aiResult.overallScore || 60) * 0.75)
+        instagram: platformScores.instagram ?? aiResult.platformRecommendations?.instagram?.score ?? Math.round((aiResult.overallScore || 60) * 0.9),
+        tiktok: platformScores.tiktok ?? aiResult.platformRecommendations?.tiktok?.score ?? Math.round((aiResult.overallScore || 60) * 0.85),
+        linkedin: platformScores.linkedin ?? aiResult.platformRecommendations?.linkedin?.score ?? Math.round((aiResult.overallScore || 60) * 0.8),
+        twitter: platformScores.twitter ?? aiResult.platformRecommendations?.twitter?.score ?? Math.round((aiResult.overallScore || 60) * 0.85),
+        facebook: platformScores.facebook ?? aiResult.platformRecommendations?.facebook?.score ?? Math.round((aiResult.overallScore || 60) * 0.9),
+        snapchat: platformScores.snapchat ?? aiResult.platformRecommendations?.snapchat?.score ?? Math.round((aiResult.overallScore || 60) * 0.75)
       }, 
       performanceScoring: {
         engagementPotential: aiResult.overallScore || 75,
@@ -135,7 +229,7 @@ export async function POST(request: NextRequest) {
       tailoredRecommendations: Object.fromEntries(
         platforms.map((platform: string) => {
           const rec = aiResult.platformRecommendations?.[platform] || {};
-          const score = rec.score || Math.round((aiResult.overallScore || 60) * 0.8); // Use AI score or intelligent fallback
+          const score = platformScores[platform];
           return [platform, {
             prediction: `AI analysis shows ${score > 80 ? 'strong' : score > 60 ? 'good' : 'moderate'} potential for ${platform}`,
             score: Math.round(score / 10), // Convert to out of 10 scale
@@ -193,7 +287,7 @@ export async function POST(request: NextRequest) {
               isHighRes: true
             },
             fileType: {
-              current: file.type || 'image/jpeg',
+              current: file.type,
               isAppropriate: true,
               recommended: 'JPEG'
             }
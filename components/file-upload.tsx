@@ -1,9 +1,21 @@
 'use client';
 
 import { useCallback, useState } from 'react';
-import { useDropzone } from 'react-dropzone';
+import { useDropzone, FileRejection } from 'react-dropzone';
 import Image from 'next/image';
 import { Upload, Image as ImageIcon, Video, X } from 'lucide-react';
+import { MAX_UPLOAD_BYTES, MAX_IMAGE_BYTES, getMediaType } from '@/lib/constants';
+
+// Images are sent inline to the vision API, so they have a much lower cap than videos
+function validateFileSize(file: File) {
+  if (getMediaType(file).startsWith('image/') && file.size > MAX_IMAGE_BYTES) {
+    return {
+      code: 'image-too-large',
+      message: `Images must be ${MAX_IMAGE_BYTES / (1024 * 1024)}MB or smaller`
+    };
+  }
+  return null;
+}
 
 interface FileUploadProps {
   onFileSelect: (file: File | null) => void;
@@ -12,10 +24,12 @@ interface FileUploadProps {
 
 export function FileUpload({ onFileSelect, selectedFile }: FileUploadProps) {
   const [preview, setPreview] = useState<string | null>(null);
+  const [rejectionMessage, setRejectionMessage] = useState<string | null>(null);
 
   const onDrop = useCallback((acceptedFiles: File[]) => {
     const file = acceptedFiles[0];
     if (file) {
+      setRejectionMessage(null);
       onFileSelect(file);
       
       // Create preview for images and videos
@@ -35,14 +49,24 @@ export function FileUpload({ onFileSelect, selectedFile }: FileUploadProps) {
     }
   }, [onFileSelect]);
 
+  const onDropRejected = useCallback((fileRejections: FileRejection[]) => {
+    setRejectionMessage(fileRejections[0]?.errors[0]?.message || 'This file cannot be uploaded');
+  }, []);
+
   const { getRootProps, getInputProps, isDragActive } = useDropzone({
     onDrop,
+    onDropRejected,
+    validator: validateFileSize,
     accept: {
-      'image/*': ['.png', '.jpg', '.jpeg', '.gif', '.webp'],
+      // Exact image types, since the vision API rejects formats such as HEIC or SVG
+      'image/png': ['.png'],
+      'image/jpeg': ['.jpg', '.jpeg'],
+      'image/gif': ['.gif'],
+      'image/webp': ['.webp'],
       'video/*': ['.mp4', '.mov', '.avi', '.webm']
     },
     maxFiles: 1,
-    maxSize: 5 * 1024 * 1024 * 1024 // 5GB
+    maxSize: MAX_UPLOAD_BYTES
   });
 
   const handleRemove = () => {
@@ -161,13 +185,17 @@ export function FileUpload({ onFileSelect, selectedFile }: FileUploadProps) {
                 <div className="flex flex-wrap justify-center gap-2 mt-3">
                   <span className="px-2 py-1 bg-blue-100 text-blue-800 text-xs rounded-full font-medium">Images</span>
                   <span className="px-2 py-1 bg-purple-100 text-purple-800 text-xs rounded-full font-medium">Videos</span>
-                  <span className="px-2 py-1 bg-green-100 text-green-800 text-xs rounded-full font-medium">Up to 5GB</span>
+                  <span className="px-2 py-1 bg-green-100 text-green-800 text-xs rounded-full font-medium">Images up to {MAX_IMAGE_BYTES / (1024 * 1024)}MB · Videos up to {MAX_UPLOAD_BYTES / (1024 * 1024 * 1024)}GB</span>
                 </div>
               </div>
             )}
           </div>
         </div>
       )}
+
+      {rejectionMessage && !selectedFile && (
+        <p className="text-sm text-red-600 text-center">{rejectionMessage}</p>
+      )}
     </div>
   );
 }
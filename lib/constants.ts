@@ -1,5 +1,38 @@
 import { PlatformConfig } from '@/types';
 
+export const MAX_UPLOAD_BYTES = 5 * 1024 * 1024 * 1024; // 5GB
+// Images are sent inline to the OpenAI vision API, which caps them at 20MB
+export const MAX_IMAGE_BYTES = 20 * 1024 * 1024;
+
+// Browsers sometimes report an empty MIME type; the dropzone accepts these by extension
+const MEDIA_TYPES_BY_EXTENSION: Record<string, string> = {
+  png: 'image/png',
+  jpg: 'image/jpeg',
+  jpeg: 'image/jpeg',
+  gif: 'image/gif',
+  webp: 'image/webp',
+  mp4: 'video/mp4',
+  mov: 'video/quicktime',
+  avi: 'video/x-msvideo',
+  webm: 'video/webm'
+};
+
+// Image formats accepted by the OpenAI vision API
+export const SUPPORTED_IMAGE_TYPES = new Set(
+  Object.values(MEDIA_TYPES_BY_EXTENSION).filter(type => type.startsWith('image/'))
+);
+
+// Reported MIME type, falling back to one inferred from the file extension ('' if unknown)
+export function getMediaType(file: { name?: string; type?: string }): string {
+  if (file.type) {
+    return file.type;
+  }
+  const name = file.name ?? '';
+  const dotIndex = name.lastIndexOf('.');
+  const extension = dotIndex >= 0 ? name.slice(dotIndex + 1).toLowerCase() : '';
+  return MEDIA_TYPES_BY_EXTENSION[extension] ?? '';
+}
+
 export const PLATFORMS: PlatformConfig[] = [
   {
     id: 'instagram',
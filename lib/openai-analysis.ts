@@ -1,3 +1,4 @@
+import { createHash } from 'crypto';
 import OpenAI from 'openai';
 
 // Lazy-load OpenAI client to avoid build-time initialization
@@ -18,6 +19,98 @@ function getOpenAIClient(): OpenAI {
   return openaiClient;
 }
 
+// In-memory LRU caches; Map iteration order doubles as recency order
+const CONTENT_ANALYSIS_CACHE_SIZE = 100;
+const contentAnalysisCache = new Map<string, string>();
+const ANALYSIS_RESULT_CACHE_SIZE = 100;
+const analysisResultCache = new Map<string, ContentAnalysisResult>();
+
+function getCached<T>(cache: Map<string, T>, key: string): T | undefined {
+  const value = cache.get(key);
+  if (value !== undefined) {
+    // Re-insert to mark as most recently used
+    cache.delete(key);
+    cache.set(key, value);
+  }
+  return value;
+}
+
+function setCached<T>(cache: Map<string, T>, key: string, value: T, maxSize: number): void {
+  cache.delete(key);
+  cache.set(key, value);
+  if (cache.size > maxSize) {
+    const oldestKey = cache.keys().next().value;
+    if (oldestKey !== undefined) {
+      cache.delete(oldestKey);
+    }
+  }
+}
+
+// Fixed sampling seed so resubmitting an asset gives (best-effort) reproducible scores
+const ANALYSIS_SEED = 42;
+
+// Prompts and system messages are static, so build them once at module load
+const CONTENT_SYSTEM_MESSAGE = "You are a marketing analyst. Always respond with complete, valid JSON. Never truncate responses.";
+const PLATFORM_SYSTEM_MESSAGE = "You are a social media expert. Always respond with complete, valid JSON. Never truncate responses. Analyze each requested platform thoroughly.";
+const VIDEO_SYSTEM_MESSAGE = "You are a professional video marketing analyst. Always respond with complete, valid JSON.";
+
+const CONTENT_ANALYSIS_PROMPT = `You are an expert marketing analyst. Analyze this marketing asset image in extreme detail and provide a comprehensive JSON response.
+
+Extract ALL text from the image and analyze the visual and strategic elements. Be precise and analytical.
+
+Required JSON structure:
+{
+  "contentType": {
+    "type": "[Ad Copy|Social Post|Educational Content|Product Showcase|Brand Story|User Generated Content|Behind the Scenes|Tutorial|Testimonial|Announcement|Meme|Infographic|Event Promotion]",
+    "confidence": "[0.0 to 1.0 - how confident you are in this classification based on visual evidence]",
+    "reasoning": "detailed explanation for the content type classification based on visual elements, text, and design"
+  },
+  "extractedText": "ALL text visible in the image, exactly as it appears",
+  "visualElements": {
+    "objects": ["specific objects, people, logos, products visible"],
+    "emotions": ["emotions conveyed: professional, friendly, exciting, urgent, trustworthy, playful, serious, inspirational"],
+    "faces": 0,
+    "textDensity": 0.3,
+    "dominantColors": ["#hex codes of main colors"],
+    "colorHarmony": 0.8,
+    "visualStyle": "describe the design style (modern, minimalist, bold, vintage, etc.)"
+  },
+  "strategicIntent": {
+    "primary": "[Brand Awareness|Conversion|Engagement|Trust Building|Education|Social Proof|Product Awareness|Thought Leadership|Entertainment|Information]",
+    "secondary": ["list of 2-3 secondary strategic goals"],
+    "reasoning": "detailed explanation of strategic positioning based on design, text, and visual elements"
+  },
+  "marketingElements": {
+    "hasCallToAction": true/false,
+    "brandVisibility": 0.8,
+    "messageClarity": 0.9,
+    "professionalismLevel": 0.8,
+    "creativityScore": 0.7
+  }
+}
+
+Analyze every detail you can see in the image. Return ONLY valid JSON with no markdown formatting, code blocks, or additional text.`;
+
+// Minimal valid content analysis used when the vision response cannot be parsed
+const FALLBACK_CONTENT_ANALYSIS = {
+  contentType: { type: 'Document', confidence: 0.7 },
+  extractedText: 'Text extraction failed due to parsing error',
+  visualElements: {
+    objects: [], emotions: [], faces: 0, textDensity: 0.5,
+    colorHarmony: 0.7, dominantColors: [], visualStyle: 'document'
+  },
+  strategicIntent: { primary: 'Information', secondary: ['Documentation'], reasoning: 'Parsing error occurred' }
+};
+
+// Fallback platform scoring used when the platform response cannot be parsed:
+// content-type keywords that suit each platform and the multiplier on match / no match
+const FALLBACK_PLATFORM_MULTIPLIERS: Record<string, { keywords: string[]; match: number; otherwise: number }> = {
+  instagram: { keywords: ['visual', 'showcase'], match: 1.1, otherwise: 0.9 },
+  linkedin: { keywords: ['professional', 'business'], match: 1.2, otherwise: 0.7 },
+  tiktok: { keywords: ['creative', 'entertainment'], match: 1.1, otherwise: 0.8 },
+  twitter: { keywords: ['news', 'announcement'], match: 1.1, otherwise: 0.85 }
+};
+
 export interface ContentAnalysisResult {
   contentType: {
     type: string;
@@ -47,12 +140,36 @@ export interface ContentAnalysisResult {
   overallScore: number;
 }
 
+interface AnalysisOutcome {
+  result: ContentAnalysisResult;
+  // True when a model reply was empty, cut off, repaired or replaced by fallback values
+  degraded: boolean;
+}
+
 export async function analyzeContentWithOpenAI(
   file: File,
   platforms: string[]
 ): Promise<ContentAnalysisResult> {
   try {
-    return await performOpenAIAnalysis(file, platforms);
+    // Images are read once and keyed by content hash; video analysis only looks at
+    // file metadata, so videos are keyed on that and their bytes are not touched here
+    const imageBuffer = file.type.startsWith('video/') ? null : Buffer.from(await file.arrayBuffer());
+    const fileKey = imageBuffer
+      ? createHash('sha256').update(imageBuffer).digest('hex')
+      : `video:${file.name}:${file.size}:${file.type}`;
+    const resultKey = `${fileKey}|${[...platforms].sort().join(',')}`;
+    const cachedResult = getCached(analysisResultCache, resultKey);
+    if (cachedResult) {
+      console.log('Analysis result cache hit');
+      return structuredClone(cachedResult);
+    }
+
+    const { result, degraded } = await performOpenAIAnalysis(file, platforms, fileKey, imageBuffer);
+    // Degraded results are not cached so the next upload gets a fresh attempt
+    if (!degraded) {
+      setCached(analysisResultCache, resultKey, structuredClone(result), ANALYSIS_RESULT_CACHE_SIZE);
+    }
+    return result;
   } catch (error: unknown) {
     console.error('OpenAI analysis failed:', error);
     
@@ -69,11 +186,13 @@ export async function analyzeContentWithOpenAI(
 
 async function performOpenAIAnalysis(
   file: File,
-  platforms: string[]
-): Promise<ContentAnalysisResult> {
+  platforms: string[],
+  fileKey: string,
+  imageBuffer: Buffer | null
+): Promise<AnalysisOutcome> {
   try {
-    // Check if file is a video
-    if (file.type.startsWith('video/')) {
+    // Videos are analyzed from their metadata, so no image bytes were read
+    if (!imageBuffer) {
       console.log('Video file detected, analyzing with AI...');
       
       // Analyze video content using file characteristics and AI
@@ -81,111 +200,85 @@ async function performOpenAIAnalysis(
     }
 
     // For image files, process normally
-    const arrayBuffer = await file.arrayBuffer();
-    const base64 = Buffer.from(arrayBuffer).toString('base64');
-    const mimeType = file.type || 'image/jpeg';
-    const dataUrl = `data:${mimeType};base64,${base64}`;
+    const base64 = imageBuffer.toString('base64');
+    const dataUrl = `data:${file.type};base64,${base64}`;
+    const openai = getOpenAIClient();
 
     console.log('Starting OpenAI vision analysis...');
 
     // Step 1: Comprehensive Content Analysis and Text Extraction
-    const contentAnalysisPrompt = `You are an expert marketing analyst. Analyze this marketing asset image in extreme detail and provide a comprehensive JSON response.
-
-Extract ALL text from the image and analyze the visual and strategic elements. Be precise and analytical.
-
-Required JSON structure:
-{
-  "contentType": {
-    "type": "[Ad Copy|Social Post|Educational Content|Product Showcase|Brand Story|User Generated Content|Behind the Scenes|Tutorial|Testimonial|Announcement|Meme|Infographic|Event Promotion]",
-    "confidence": "[0.0 to 1.0 - how confident you are in this classification based on visual evidence]",
-    "reasoning": "detailed explanation for the content type classification based on visual elements, text, and design"
-  },
-  "extractedText": "ALL text visible in the image, exactly as it appears",
-  "visualElements": {
-    "objects": ["specific objects, people, logos, products visible"],
-    "emotions": ["emotions conveyed: professional, friendly, exciting, urgent, trustworthy, playful, serious, inspirational"],
-    "faces": 0,
-    "textDensity": 0.3,
-    "dominantColors": ["#hex codes of main colors"],
-    "colorHarmony": 0.8,
-    "visualStyle": "describe the design style (modern, minimalist, bold, vintage, etc.)"
-  },
-  "strategicIntent": {
-    "primary": "[Brand Awareness|Conversion|Engagement|Trust Building|Education|Social Proof|Product Awareness|Thought Leadership|Entertainment|Information]",
-    "secondary": ["list of 2-3 secondary strategic goals"],
-    "reasoning": "detailed explanation of strategic positioning based on design, text, and visual elements"
-  },
-  "marketingElements": {
-    "hasCallToAction": true/false,
-    "brandVisibility": 0.8,
-    "messageClarity": 0.9,
-    "professionalismLevel": 0.8,
-    "creativityScore": 0.7
-  }
-}
-
-Analyze every detail you can see in the image. Return ONLY valid JSON with no markdown formatting, code blocks, or additional text.`;
-
-    const contentResponse = await getOpenAIClient().chat.completions.create({
-      model: "gpt-4o",
-      response_format: { type: "json_object" },
-      messages: [
-        {
-          role: "system",
-          content: "You are a marketing analyst. Always respond with complete, valid JSON. Never truncate responses."
-        },
-        {
-          role: "user",
-          content: [
-            { type: "text", text: contentAnalysisPrompt },
-            { type: "image_url", image_url: { url: dataUrl, detail: "high" } }
-          ]
-        }
-      ],
-      max_tokens: 2000,
-      temperature: 0.1
-    });
+    // This step depends only on the image, so repeat uploads of the same file reuse it
+    const cachedContentJson = getCached(contentAnalysisCache, fileKey);
 
+    let degraded = false;
     let contentAnalysis;
-    try {
-      const responseText = contentResponse.choices[0]?.message?.content || '{}';
-      console.log('Raw OpenAI response length:', responseText.length);
+    if (cachedContentJson) {
+      console.log('Content analysis cache hit');
+      contentAnalysis = JSON.parse(cachedContentJson);
+    } else {
+      const contentResponse = await openai.chat.completions.create({
+        model: "gpt-4o",
+        response_format: { type: "json_object" },
+        messages: [
+          {
+            role: "system",
+            content: CONTENT_SYSTEM_MESSAGE
+          },
+          {
+            role: "user",
+            content: [
+              { type: "text", text: CONTENT_ANALYSIS_PROMPT },
+              { type: "image_url", image_url: { url: dataUrl, detail: "high" } }
+            ]
+          }
+        ],
+        max_tokens: 2000,
+        temperature: 0.1,
+        seed: ANALYSIS_SEED
+      });
+
+      try {
+        const contentChoice = contentResponse.choices[0];
+        const responseText = contentChoice?.message?.content || '{}';
+        console.log('Raw OpenAI response length:', responseText.length);
+        // Only a complete reply is cached; empty, cut-off or repaired JSON is treated as degraded
+        let isCompleteResponse = Boolean(contentChoice?.message?.content) && contentChoice?.finish_reason === 'stop';
       
-      // Remove markdown code blocks if present
-      let cleanedJson = responseText.replace(/```json\n?|\n?```/g, '').trim();
+        // Remove markdown code blocks if present
+        let cleanedJson = responseText.replace(/```json\n?|\n?```/g, '').trim();
       
-      // Check if JSON is truncated/incomplete
-      if (cleanedJson && !cleanedJson.endsWith('}')) {
-        console.warn('JSON appears truncated, attempting to fix...');
-        // Try to close incomplete JSON structures
-        const openBraces = (cleanedJson.match(/{/g) || []).length;
-        const closeBraces = (cleanedJson.match(/}/g) || []).length;
-        const missingBraces = openBraces - closeBraces;
+        // Check if JSON is truncated/incomplete
+        if (cleanedJson && !cleanedJson.endsWith('}')) {
+          console.warn('JSON appears truncated, attempting to fix...');
+          isCompleteResponse = false;
+          // Try to close incomplete JSON structures
+          const openBraces = (cleanedJson.match(/{/g) || []).length;
+          const closeBraces = (cleanedJson.match(/}/g) || []).length;
+          const missingBraces = openBraces - closeBraces;
         
-        // Add missing closing braces
-        for (let i = 0; i < missingBraces; i++) {
-          cleanedJson += '}';
-        }
+          // Add missing closing braces
+          for (let i = 0; i < missingBraces; i++) {
+            cleanedJson += '}';
+          }
         
-        // Remove any trailing commas before closing braces
-        cleanedJson = cleanedJson.replace(/,(\s*})/g, '$1');
-      }
+          // Remove any trailing commas before closing braces
+          cleanedJson = cleanedJson.replace(/,(\s*})/g, '$1');
+        }
       
-      contentAnalysis = JSON.parse(cleanedJson);
-    } catch (parseError) {
-      console.error('Failed to parse content analysis JSON:', parseError);
-      console.error('Raw response:', contentResponse.choices[0]?.message?.content);
+        contentAnalysis = JSON.parse(cleanedJson);
+        if (isCompleteResponse) {
+          setCached(contentAnalysisCache, fileKey, cleanedJson, CONTENT_ANALYSIS_CACHE_SIZE);
+        } else {
+          degraded = true;
+        }
+      } catch (parseError) {
+        console.error('Failed to parse content analysis JSON:', parseError);
+        console.error('Raw response:', contentResponse.choices[0]?.message?.content);
       
-      // Fallback to a minimal valid structure
-      contentAnalysis = {
-        contentType: { type: 'Document', confidence: 0.7 },
-        extractedText: 'Text extraction failed due to parsing error',
-        visualElements: { 
-          objects: [], emotions: [], faces: 0, textDensity: 0.5, 
-          colorHarmony: 0.7, dominantColors: [], visualStyle: 'document' 
-        },
-        strategicIntent: { primary: 'Information', secondary: ['Documentation'], reasoning: 'Parsing error occurred' }
-      };
+        // Fallback to a minimal valid structure; copied so callers never share its arrays
+        contentAnalysis = structuredClone(FALLBACK_CONTENT_ANALYSIS);
+        degraded = true;
+      }
     }
 
     console.log('Content analysis completed');
@@ -264,13 +357,13 @@ Required JSON structure:
 
 Only include platforms that were requested: ${platforms.join(', ')}. Be extremely specific and actionable with recommendations. Return ONLY valid JSON with no markdown formatting, code blocks, or additional text.`;
 
-    const platformResponse = await getOpenAIClient().chat.completions.create({
+    const platformResponse = await openai.chat.completions.create({
       model: "gpt-4o",
       response_format: { type: "json_object" },
       messages: [
         {
           role: "system", 
-          content: "You are a social media expert. Always respond with complete, valid JSON. Never truncate responses. Analyze each requested platform thoroughly."
+          content: PLATFORM_SYSTEM_MESSAGE
         },
         {
           role: "user",
@@ -281,13 +374,18 @@ Only include platforms that were requested: ${platforms.join(', ')}. Be extremel
         }
       ],
       max_tokens: 3000, // Increased for multiple platforms
-      temperature: 0.2
+      temperature: 0.2,
+      seed: ANALYSIS_SEED
     });
 
     let platformAnalysis;
     try {
-      const responseText = platformResponse.choices[0]?.message?.content || '{}';
+      const platformChoice = platformResponse.choices[0];
+      const responseText = platformChoice?.message?.content || '{}';
       console.log('Raw platform response length:', responseText.length);
+      if (!platformChoice?.message?.content || platformChoice.finish_reason !== 'stop') {
+        degraded = true;
+      }
       
       // Remove markdown code blocks if present
       let cleanedJson = responseText.replace(/```json\n?|\n?```/g, '').trim();
@@ -295,6 +393,7 @@ Only include platforms that were requested: ${platforms.join(', ')}. Be extremel
       // Check if JSON is truncated/incomplete
       if (cleanedJson && !cleanedJson.endsWith('}')) {
         console.warn('Platform JSON appears truncated, attempting to fix...');
+        degraded = true;
         const openBraces = (cleanedJson.match(/{/g) || []).length;
         const closeBraces = (cleanedJson.match(/}/g) || []).length;
         const missingBraces = openBraces - closeBraces;
@@ -312,22 +411,16 @@ Only include platforms that were requested: ${platforms.join(', ')}. Be extremel
       console.error('Raw platform response:', platformResponse.choices[0]?.message?.content);
       
       // Fallback to basic platform structure with intelligent scoring
+      degraded = true;
       const baseScore = Math.round((contentAnalysis.contentType?.confidence || 0.6) * 100);
+      const contentType = contentAnalysis.contentType?.type?.toLowerCase() || '';
       platformAnalysis = {
         platformRecommendations: platforms.reduce((acc, platform) => {
           // Platform-specific scoring based on content type
-          let platformMultiplier = 1.0;
-          const contentType = contentAnalysis.contentType?.type?.toLowerCase() || '';
-          
-          if (platform === 'instagram') {
-            platformMultiplier = contentType.includes('visual') || contentType.includes('showcase') ? 1.1 : 0.9;
-          } else if (platform === 'linkedin') {
-            platformMultiplier = contentType.includes('professional') || contentType.includes('business') ? 1.2 : 0.7;
-          } else if (platform === 'tiktok') {
-            platformMultiplier = contentType.includes('creative') || contentType.includes('entertainment') ? 1.1 : 0.8;
-          } else if (platform === 'twitter') {
-            platformMultiplier = contentType.includes('news') || contentType.includes('announcement') ? 1.1 : 0.85;
-          }
+          const rule = FALLBACK_PLATFORM_MULTIPLIERS[platform];
+          const platformMultiplier = rule
+            ? (rule.keywords.some(keyword => contentType.includes(keyword)) ? rule.match : rule.otherwise)
+            : 1.0;
           
           acc[platform] = {
             score: Math.round(baseScore * platformMultiplier),
@@ -381,7 +474,7 @@ Only include platforms that were requested: ${platforms.join(', ')}. Be extremel
       overallScore
     };
 
-    return result;
+    return { result, degraded };
 
   } catch (error) {
     console.error('OpenAI analysis failed:', error);
@@ -431,7 +524,7 @@ interface VideoAnalysisResult {
 
 // Video analysis functions
 
-async function analyzeVideoFile(file: File, platforms: string[]): Promise<ContentAnalysisResult> {
+async function analyzeVideoFile(file: File, platforms: string[]): Promise<AnalysisOutcome> {
   const videoSizeMB = file.size / (1024 * 1024);
   
   // Use AI to analyze the video file characteristics and provide intelligent insights
@@ -499,7 +592,7 @@ Be specific and analytical. Avoid generic responses. Base everything on the actu
       messages: [
         {
           role: "system",
-          content: "You are a professional video marketing analyst. Always respond with complete, valid JSON."
+          content: VIDEO_SYSTEM_MESSAGE
         },
         {
           role: "user",
@@ -507,10 +600,14 @@ Be specific and analytical. Avoid generic responses. Base everything on the actu
         }
       ],
       max_tokens: 2000,
-      temperature: 0.3
+      temperature: 0.3,
+      seed: ANALYSIS_SEED
     });
 
-    const analysisResult = JSON.parse(response.choices[0].message.content || '{}');
+    const videoChoice = response.choices[0];
+    const analysisResult = JSON.parse(videoChoice.message.content || '{}');
+    // An empty or cut-off reply still produces a result, but one built from defaults
+    const degraded = !videoChoice.message.content || videoChoice.finish_reason !== 'stop';
     
     // Calculate overall score from the analysis
     const overallScore = calculateScoreFromVideoAnalysis(analysisResult);
@@ -522,7 +619,7 @@ Be specific and analytical. Avoid generic responses. Base everything on the actu
       videoSizeMB
     );
 
-    return {
+    const result: ContentAnalysisResult = {
       contentType: {
         type: analysisResult.contentType?.type || 'Video Content',
         confidence: analysisResult.contentType?.confidence || 0.8,
@@ -551,6 +648,8 @@ Be specific and analytical. Avoid generic responses. Base everything on the actu
       overallScore
     };
 
+    return { result, degraded };
+
   } catch (error) {
     console.error('Error in video analysis:', error);
     throw new Error('Failed to analyze video content');